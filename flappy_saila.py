@@ -1,4 +1,4 @@
-from game_engine import GameEnvironment, SpriteObject, GameObject, RectObject, load_image
+from game_engine import GameEnvironment, SpriteObject, GameObject, RectObject, load_image, render_text, get_font, convert_surface
 import sys
 import pygame
 import random
@@ -19,9 +19,10 @@ class PlayerObject(RectObject):
 
 		self.jump_requested = False
 
-	def update(self, dt):
-		super().update(dt) 
-		keys = pygame.key.get_pressed()
+	def update(self, dt, keys=None):
+		super().update(dt, keys)
+		if keys is None:
+			keys = pygame.key.get_pressed()
 
 		if keys[pygame.K_SPACE]:
 			self.jump_requested = True
@@ -43,23 +44,18 @@ class PlayerObject(RectObject):
 		# keep our collision rect in sync with position
 
 		# collision detection with pipes
-		# PipesManager now stores pipes as a list of (top_pipe, bottom_pipe) tuples.
-		# Build a flat list of rects for collision testing.
-		pipe_rects = []
-		for pair in self.pipes_manager.pipes:
-			top, bottom = pair
-			pipe_rects.append(top.rect)
-			pipe_rects.append(bottom.rect)
-
-		idx_collision = self.collide_list(pipe_rects)
+		# PipesManager keeps a flat list of pipe rects in sync with its pipes,
+		# so no per-frame list has to be built here.
+		idx_collision = self.collide_list(self.pipes_manager.query_near(self.rect.x))
 		if idx_collision != -1:
 			self.on_lose()
 			
 	def draw(self, surface):
 		ax, ay = self.get_abs_pos()
 		fps_text = f"Pos: {int(ax)}, {int(ay)}"
-		surf = pygame.font.Font(None, 24).render(fps_text, True, pygame.Color("white"))
-		surface.blit(surf, (150, 8))
+		# changes nearly every frame, so caching the surface would not pay off
+		surf = get_font(24).render(fps_text, True, pygame.Color("white"))
+		drawn = [surface.blit(surf, (150, 8))]
 
 		# Draw a horizontal line at the y position of the next pipe gap for debugging
 		# Use the player's world x to query the pipes manager. If no pipes exist,
@@ -68,12 +64,33 @@ class PlayerObject(RectObject):
 		if gap_y is not None:
 			# draw across the whole screen
 			color = pygame.Color("yellow")
-			pygame.draw.line(surface, color, (0, int(gap_y)), (width, int(gap_y)), 2)
+			drawn.append(pygame.draw.line(surface, color, (0, int(gap_y)), (width, int(gap_y)), 2))
+		return drawn
 
 class PipeObject(SpriteObject):
 	def __init__(self, x, y, width, height, color):
 		super().__init__(x, y, width, height, color)
 		self.passed_score = False
+		# (first, last) spatial hash cells this pipe is bucketed under
+		self.last_cell: tuple[int, int] | None = None
+
+def step_pipes(pipe_x, passed, dt, speed, score_x, pipe_width):
+	"""Scroll pipe pairs left and mark the ones that crossed score_x.
+
+	pipe_x and passed are updated in place. Returns (score_inc, alive)
+	where alive[i] is False once pair i is completely off-screen.
+	"""
+	dx = speed * dt
+	score_inc = 0
+	alive = []
+	for i in range(len(pipe_x)):
+		x = pipe_x[i] - dx
+		pipe_x[i] = x
+		if not passed[i] and x + pipe_width < score_x:
+			passed[i] = True
+			score_inc += 1
+		alive.append(x + pipe_width >= 0)
+	return score_inc, alive
 
 class PipesManager(GameObject):
 	def __init__(self, x_pos_score):
@@ -85,52 +102,132 @@ class PipesManager(GameObject):
 		self.score = 0
 
 		self.pipes: list[tuple[PipeObject, PipeObject]] = []
-		# optional shared pipe image (Surface) that will be applied to spawned pipes
-		self.pipe_image: pygame.Surface | None = None
+		# numeric state per pair, index-aligned with self.pipes (x is shared by
+		# top and bottom); step_pipes works on these instead of the objects
+		self.pipe_x: list[float] = []
+		self.pipe_passed: list[bool] = []
+		# flat list of every pipe rect for collision tests; the rects are
+		# mutated in place by the pipes, so only spawn/removal touch this list
+		self.pipe_rects: list[pygame.Rect] = []
+		# optional shared pipe image (Surface) that will be applied to spawned
+		# pipes, see the pipe_image property
+		self._pipe_image: pygame.Surface | None = None
+		# pre-flipped/converted copies of pipe_image, built by set_pipe_image
+		self._top_pipe_image: pygame.Surface | None = None
+		self._bottom_pipe_image: pygame.Surface | None = None
 		self.pipe_speed = 150
 		self.spawn_timer = 0.0
 		self.spawn_interval = 2.0
 		self.gap_height = 150
 		self.pipe_width = 80
 
-	def update(self, dt):
+		# 1D spatial hash over absolute pipe x positions: cell key -> rects in
+		# that cell. Below spatial_hash_threshold rects a flat scan is cheaper,
+		# so the grid is only kept up to date above it.
+		self.cell_size = max(32, 2 * self.pipe_width)
+		self.grid: dict[int, list[pygame.Rect]] = {}
+		self.spatial_hash_threshold = 32
+
+	def update(self, dt, keys=None):
 		self.spawn_timer += dt
 		if self.spawn_timer >= self.spawn_interval:
 			self.spawn_timer -= self.spawn_interval
 			self.spawn_pipe()
 
-		# Iterate over pipe pairs (top, bottom)
-		for pair in self.pipes[:]:
+		# scroll and score every pair in one pass over the numeric state,
+		# then mirror the results onto the pipe objects; their rects follow
+		# when the engine updates them as our children
+		score_inc, alive = step_pipes(self.pipe_x, self.pipe_passed, dt,
+			self.pipe_speed, self.x_pos_score, self.pipe_width)
+		for _ in range(score_inc):
+			print("Score!")
+		self.score += score_inc
+
+		use_grid = len(self.pipe_rects) >= self.spatial_hash_threshold
+		if not use_grid and self.grid:
+			self._clear_grid()
+
+		survivors = []
+		dead = set()
+		# bind per-pair calls to locals, they are looked up on every iteration
+		keep_pair = survivors.append
+		kill = dead.add
+		bucket = self._bucket
+		unbucket = self._unbucket
+		# our absolute x, to bucket pipes by the same coordinates as their rects
+		ax = self._abs_x
+		# zip the aligned lists instead of indexing/attribute lookups per pair
+		for pair, x, passed, keep in zip(self.pipes, self.pipe_x, self.pipe_passed, alive):
 			top, bottom = pair
-			# move both pipes left
-			top.x -= self.pipe_speed * dt
-			bottom.x -= self.pipe_speed * dt
-
-			# update their rects via their update calls
-			top.update(dt)
-			bottom.update(dt)
-
-			# increase score once per pair when the pair passes scoring x position
-			if not getattr(top, 'passed_score', False) and top.x + top.width < self.x_pos_score:
-				top.passed_score = True
-				print("Score!")
-				self.score += 1
-
-			# remove pair if completely off-screen
-			if top.x + top.width < 0:
-				# remove both from children and from pipes list
-				try:
-					self.children.remove(top)
-				except ValueError:
-					pass
-				try:
-					self.children.remove(bottom)
-				except ValueError:
-					pass
-				try:
-					self.pipes.remove(pair)
-				except ValueError:
-					pass
+			top.x = bottom.x = x
+			top.passed_score = passed
+
+			# keep pair unless completely off-screen
+			if keep:
+				if use_grid:
+					bucket(top, ax + x)
+					bucket(bottom, ax + x)
+				keep_pair(pair)
+			else:
+				kill(top)
+				kill(bottom)
+				if use_grid:
+					unbucket(top)
+					unbucket(bottom)
+
+		if dead:
+			# one filtering pass instead of a list.remove scan per pipe
+			self.pipes = survivors
+			self.pipe_x = [x for x, keep in zip(self.pipe_x, alive) if keep]
+			self.pipe_passed = [p for p, keep in zip(self.pipe_passed, alive) if keep]
+			self.remove_children(dead)
+			self.pipe_rects = [pipe.rect for pair in survivors for pipe in pair]
+
+	def _bucket(self, pipe, abs_x):
+		# (re)insert the pipe rect under every cell it overlaps, only when
+		# its cell span actually changed since the last call
+		cell_size = self.cell_size
+		cells = (int(abs_x // cell_size), int((abs_x + pipe.width) // cell_size))
+		if cells == pipe.last_cell:
+			return
+		self._unbucket(pipe)
+		for key in range(cells[0], cells[1] + 1):
+			self.grid.setdefault(key, []).append(pipe.rect)
+		pipe.last_cell = cells
+
+	def _unbucket(self, pipe):
+		if pipe.last_cell is None:
+			return
+		first, last = pipe.last_cell
+		for key in range(first, last + 1):
+			bucket = self.grid.get(key)
+			if bucket is None:
+				continue
+			for i, rect in enumerate(bucket):
+				if rect is pipe.rect:
+					del bucket[i]
+					break
+			if not bucket:
+				del self.grid[key]
+		pipe.last_cell = None
+
+	def _clear_grid(self):
+		self.grid.clear()
+		for pair in self.pipes:
+			for pipe in pair:
+				pipe.last_cell = None
+
+	def query_near(self, x):
+		"""Return the pipe rects that may collide with something at absolute x.
+
+		Looks up the cell containing x and its two neighbours. With only a
+		few pipes alive the flat pipe_rects list is returned instead.
+		"""
+		if len(self.pipe_rects) < self.spatial_hash_threshold:
+			return self.pipe_rects
+		key = int(x // self.cell_size)
+		grid = self.grid
+		return grid.get(key - 1, []) + grid.get(key, []) + grid.get(key + 1, [])
 
 	def spawn_pipe(self):
 		top_height = random.randint(50, height - self.gap_height - 50)
@@ -139,30 +236,48 @@ class PipesManager(GameObject):
 		top_pipe = PipeObject(x_spawn, 0, self.pipe_width, top_height, (0,255,0))
 		bottom_pipe = PipeObject(x_spawn, top_height + self.gap_height, self.pipe_width, bottom_height, (0,255,0))
 		# if a pipe image is set on this manager, assign images to pipes
-		if self.pipe_image:
-			# flip top vertically so opening faces down
-			top_img = pygame.transform.flip(self.pipe_image, False, True)
-			top_pipe.image = top_img
-			bottom_pipe.image = self.pipe_image
+		if self._top_pipe_image is not None:
+			top_pipe.set_image(self._top_pipe_image)
+			bottom_pipe.set_image(self._bottom_pipe_image)
 
 		# store as a tuple (top, bottom)
 		self.pipes.append((top_pipe, bottom_pipe))
+		self.pipe_x.append(x_spawn)
+		self.pipe_passed.append(False)
+		self.pipe_rects.append(top_pipe.rect)
+		self.pipe_rects.append(bottom_pipe.rect)
 		self.add_child(top_pipe)
 		self.add_child(bottom_pipe)
 
+	@property
+	def pipe_image(self):
+		return self._pipe_image
+
+	@pipe_image.setter
+	def pipe_image(self, surface):
+		self.set_pipe_image(surface)
+
+	def set_pipe_image(self, surface):
+		"""Set the shared pipe image. The flipped top-pipe copy is built
+		once here instead of on every spawn.
+		"""
+		self._pipe_image = surface
+		if surface is None:
+			self._top_pipe_image = None
+			self._bottom_pipe_image = None
+			return
+		# flip top vertically so opening faces down
+		self._top_pipe_image = convert_surface(pygame.transform.flip(surface, False, True))
+		self._bottom_pipe_image = convert_surface(surface)
+
 	def reset(self):
-		# remove pipe pairs and children safely
-		for pair in self.pipes[:]:
-			top, bottom = pair
-			try:
-				self.children.remove(top)
-			except ValueError:
-				pass
-			try:
-				self.children.remove(bottom)
-			except ValueError:
-				pass
+		# remove pipe pairs and their children in one pass
+		self.remove_children({pipe for pair in self.pipes for pipe in pair})
 		self.pipes.clear()
+		self.pipe_x.clear()
+		self.pipe_passed.clear()
+		self.pipe_rects.clear()
+		self.grid.clear()
 		# children that are not pipes will remain
 		self.spawn_timer = 0.0
 		self.score = 0
@@ -209,8 +324,8 @@ class PipesManager(GameObject):
 
 	def draw(self, surface):
 		fps_text = f"Pipes Score: {self.score}"
-		surf = pygame.font.Font(None, 24).render(fps_text, True, pygame.Color("white"))
-		surface.blit(surf, (8, 28))
+		surf = render_text(fps_text, pygame.Color("white"))
+		return surface.blit(surf, (8, 28))
 
 
 fps = 60
@@ -227,18 +342,20 @@ class EndScreenManager(GameObject):
 	def draw(self, surface):
 		if self.is_game_over:
 			fps_text = "Game Over! Press R to Restart"
-			surf = pygame.font.Font(None, 48).render(fps_text, True, pygame.Color("red"))
+			surf = render_text(fps_text, pygame.Color("red"), 48)
 
 			rect = surf.get_rect(center=(width//2, height//2))
-			surface.blit(surf, rect.topleft)
+			return surface.blit(surf, rect.topleft)
+		return []
 
 	# detect if you passed a pipe and increase score
 
 
-	def update(self, dt):
+	def update(self, dt, keys=None):
 		# listen for R key to restart if game is over
 		if self.is_game_over:
-			keys = pygame.key.get_pressed()
+			if keys is None:
+				keys = pygame.key.get_pressed()
 			if keys[pygame.K_r]:
 				print("Restarting game...")
 				self.is_game_over = False
@@ -36,6 +36,12 @@ class GameObject():
 		# reference to parent object (None for root)
 		self.parent_obj: GameObject | None = None
 		self.enabled = True
+		# absolute position cache, refreshed top-down every frame by GameEngine.update
+		self._abs_x = x
+		self._abs_y = y
+		# set on the tree root whenever children are added/removed anywhere
+		# below it, so cached traversal orders know to rebuild
+		self._dirty_tree = True
 
 	# tell pylance that return type is of type cls_type or None
 	def get_child_of_type(self, cls_type: Type[T]) -> Optional[T]:
@@ -55,40 +61,103 @@ class GameObject():
 		# set parent reference on child, then add to children list
 		child.parent_obj = self
 		self.children.append(child)
+		self._mark_tree_dirty()
+
+	def remove_child(self, child):
+		self.children.remove(child)
+		child.parent_obj = None
+		self._mark_tree_dirty()
+
+	def remove_children(self, dead):
+		"""Remove every child contained in the set ``dead`` in one pass."""
+		self.children = [child for child in self.children if child not in dead]
+		for child in dead:
+			child.parent_obj = None
+		self._mark_tree_dirty()
+
+	def _mark_tree_dirty(self):
+		node = self
+		while node.parent_obj is not None:
+			node = node.parent_obj
+		node._dirty_tree = True
 		
 	def draw(self, surface):
-		pass
+		"""Draw this object and return the Rect (or list of Rects) it
+		touched, [] if nothing, so the window can limit its display update
+		to them. Returning None means the touched area is unknown and makes
+		the window fill and flip the whole screen.
+		"""
+		return []
 
-	def update(self, dt):
-		pass
+	def get_blit(self):
+		"""Return (source, dest) if drawing this object is exactly one blit.
+
+		GameEngine only uses it to batch objects whose class keeps
+		SpriteObject.draw; any class that overrides draw() is drawn through
+		draw() whatever this returns.
+		"""
+		return None
 
-	def update_all(self, dt):
-		if self.enabled:
-			self.update(dt)
-			for child in self.children:
-				child.update_all(dt)
+	def update(self, dt, keys=None):
+		# keys is the pygame.key.get_pressed() snapshot for this frame
+		pass
 
 	def set_enable_children(self, enabled):
 		for child in self.children:
 			child.enabled = enabled
 
-	def draw_all(self, surface):
-		self.draw(surface)
+	def draw_all(self, surface, dirty=None):
+		# dirty, if given, collects the rects returned by each draw call.
+		# Returns False if some draw() did not report what it touched.
+		drawn = self.draw(surface)
+		reported = drawn is not None
+		if dirty is not None and reported:
+			_add_dirty(dirty, drawn)
 		for child in self.children:
-			child.draw_all(surface)
+			reported = child.draw_all(surface, dirty) and reported
+		return reported
 
 	def get_abs_pos(self):
-		"""Return the absolute (x, y) position by walking up the parent chain.
+		"""Return the cached absolute (x, y) position.
 
-		If this object has no parent (parent_obj is None), its absolute
-		position is simply its local (self.x, self.y). Otherwise, add
-		this object's local position to its parent's absolute position.
+		The cache is filled top-down by GameEngine.update: parents are visited
+		before their children, so no parent chain walk is needed.
+		Before the first update it holds the local (self.x, self.y).
 		"""
-		if self.parent_obj is None:
-			return (self.x, self.y)
-		# recursively obtain parent's absolute position
-		parent_x, parent_y = self.parent_obj.get_abs_pos()
-		return (parent_x + self.x, parent_y + self.y)
+		return (self._abs_x, self._abs_y)
+
+
+def _add_dirty(dirty, drawn):
+	# draw() returns either a single Rect or a list of them
+	if isinstance(drawn, pygame.Rect):
+		dirty.append(drawn)
+	else:
+		dirty.extend(drawn)
+
+
+def rects_area(rects):
+	# summed area, overlaps counted twice, matching what filling each costs
+	return sum(r.w * r.h for r in rects)
+
+
+def build_order(root):
+	"""Return the objects below ``root`` in pre-order (parents before their
+	children, siblings in list order) as (obj, subtree_end) pairs, where
+	subtree_end is the index just past the object's last descendant.
+	"""
+	order = []
+	stack = [(child, None) for child in reversed(root.children)]
+	while stack:
+		obj, start = stack.pop()
+		if start is not None:
+			# all descendants have been emitted, close the subtree
+			order[start] = (obj, len(order))
+			continue
+		stack.append((obj, len(order)))
+		order.append((obj, 0))
+		for child in reversed(obj.children):
+			stack.append((child, None))
+	return order
 
 
 class RectObject(GameObject):
@@ -99,10 +168,16 @@ class RectObject(GameObject):
 		ax, ay = self.get_abs_pos()
 		self.rect = pygame.Rect(ax, ay, self.width, self.height)
 
-	def update(self, dt):
-		self.rect.topleft = self.get_abs_pos()
+	def update(self, dt, keys=None):
+		# two scalar writes instead of packing a tuple for rect.topleft;
+		# Rect rounds float coordinates the same way in both cases
+		rect = self.rect
+		rect.x = self._abs_x
+		rect.y = self._abs_y
 
 	def collide_list(self, other_rects):
+		# Rect.collidelist loops over the candidates in C, which beats any
+		# inlined per-rect bounds check written in Python
 		return pygame.Rect.collidelist(self.rect, other_rects)
 		
 class SpriteObject(RectObject):	
@@ -110,19 +185,68 @@ class SpriteObject(RectObject):
 		super().__init__(x, y, width, height)
 		self.color = color
 		self.image = None
+		# image scaled to (width, height), rebuilt only when image or size change
+		self._scaled_image = None
+		self._scaled_size = (None, None)
+		self._scaled_source = None
+		# solid color surface used while there is no image, rebuilt only
+		# when the size or color change
+		self._color_surface = None
+		self._color_size = (None, None)
+		self._color_fill = None
 
 	def draw(self, surface):
+		# cull sprites fully outside the drawable area
+		if not surface.get_clip().colliderect(self.rect):
+			return []
+		return surface.blit(*self.get_blit())
+
+	def get_blit(self):
 		if self.image:
-			img = pygame.transform.scale(self.image, (int(self.width), int(self.height)))
-			surface.blit(img, self.rect.topleft)
-		else:
-			pygame.draw.rect(surface, self.color, self.rect)
+			if self._scaled_source is not self.image or self._scaled_size != (int(self.width), int(self.height)):
+				self._rebuild_scaled()
+			return (self._scaled_image, self.rect.topleft)
+		# compare as tuples on both sides so list or Color values match too;
+		# tuple() of a tuple color returns it unchanged
+		if self._color_size != (int(self.width), int(self.height)) or tuple(self.color) != self._color_fill:
+			self._rebuild_color()
+		return (self._color_surface, self.rect.topleft)
 
 	def set_image(self, surface):
-		"""Assign a pygame.Surface to this sprite. The surface will be
-		scaled during draw to the sprite's width/height.
+		"""Assign a pygame.Surface to this sprite. The surface is scaled to
+		the sprite's width/height once here and again only on resize, and the
+		scaled copy is converted to the display pixel format.
 		"""
 		self.image = surface
+		if surface is not None:
+			self._rebuild_scaled()
+
+	def _rebuild_scaled(self):
+		size = (int(self.width), int(self.height))
+		# only the scaled copy is ever blitted, so that is the one converted
+		self._scaled_image = convert_surface(pygame.transform.scale(self.image, size))
+		self._scaled_size = size
+		self._scaled_source = self.image
+
+	def _rebuild_color(self):
+		size = (int(self.width), int(self.height))
+		color_surface = pygame.Surface(size)
+		color_surface.fill(self.color)
+		self._color_surface = convert_surface(color_surface)
+		self._color_size = size
+		self._color_fill = tuple(self.color)
+
+def convert_surface(surface):
+	"""Return ``surface`` converted to the display pixel format so blits
+	need no per-call conversion. Per-pixel alpha is kept for SRCALPHA
+	surfaces. Without a video mode (headless) the surface is returned as is.
+	"""
+	try:
+		if surface.get_flags() & pygame.SRCALPHA:
+			return surface.convert_alpha()
+		return surface.convert()
+	except pygame.error:
+		return surface
 
 def load_image(filename):
 	try:
@@ -132,31 +256,163 @@ def load_image(filename):
 		print(f"Error loading image {filename}: {e}")
 		return None
 
+# Font objects by size and rendered text surfaces by (text, color, size).
+# The text cache is cleared when it grows past _TEXT_CACHE_LIMIT. Both are
+# only valid while pygame.font is initialized, see clear_text_cache.
+_fonts: dict[int, pygame.font.Font] = {}
+_text_cache: dict[tuple, pygame.Surface] = {}
+_TEXT_CACHE_LIMIT = 256
+
+def get_font(size=24):
+	"""Return the shared default-font Font object for ``size``."""
+	font = _fonts.get(size)
+	if font is None:
+		font = _fonts[size] = pygame.font.Font(None, size)
+	return font
+
+def render_text(text, color, size=24):
+	"""Render text with the default font, reusing the Font object and any
+	surface already rendered for the same text, color and size. Meant for
+	text that rarely changes; render per-frame text with get_font instead.
+	"""
+	key = (text, tuple(color), size)
+	surf = _text_cache.get(key)
+	if surf is None:
+		if len(_text_cache) >= _TEXT_CACHE_LIMIT:
+			_text_cache.clear()
+		surf = _text_cache[key] = get_font(size).render(text, True, color)
+	return surf
+
+def clear_text_cache():
+	# Font objects must not outlive pygame.font.quit(): using one after a
+	# pygame.quit()/init cycle crashes the interpreter
+	_fonts.clear()
+	_text_cache.clear()
+
+# Events meaning part of the window must be repainted. WINDOWEXPOSED only
+# exists from pygame 2.0.1 on; older versions fall back to VIDEOEXPOSE.
+EXPOSE_EVENTS = (getattr(pygame, "WINDOWEXPOSED", pygame.VIDEOEXPOSE), pygame.VIDEOEXPOSE)
+
+class _NoKeysPressed:
+	# stands in for pygame.key.get_pressed() when the display is not initialized
+	def __getitem__(self, key):
+		return False
+
+NO_KEYS = _NoKeysPressed()
+
 class GameEngine:
 	def __init__(self, surface):
 		self.rootObject = GameObject()
 		self.surface = surface
+		# keyboard state, polled once per frame in update()
+		self.keys = None
+		# set when the window was exposed and needs a full repaint
+		self.exposed = False
+		# flat pre-order of the scene graph, rebuilt only when the tree changes
+		self._order: list[tuple[GameObject, int]] = []
+		# per class: may draw() be replaced by a batched get_blit()
+		self._batchable: dict[type, bool] = {}
 		
 	def add_object(self, obj):
 		self.rootObject.add_child(obj)
 
+	def get_order(self):
+		root = self.rootObject
+		if root._dirty_tree:
+			self._order = build_order(root)
+			root._dirty_tree = False
+		return self._order
+
 	#draw 
-	def draw(self):
-		self.rootObject.draw_all(self.surface)
+	def draw(self, dirty=None):
+		# Returns False if some draw() did not report the rects it touched.
+		surface = self.surface
+		reported = True
+		# consecutive single-blit objects are sent to Surface.blits in one
+		# call, keeping draw order while the per-sprite loop runs in C
+		batch = []
+		view = surface.get_clip()
+		batchable = self._batchable
+		for obj, _ in self.get_order():
+			cls = type(obj)
+			can_batch = batchable.get(cls)
+			if can_batch is None:
+				# a subclass overriding draw() must not be replaced by get_blit()
+				can_batch = batchable[cls] = cls.draw is SpriteObject.draw
+			if can_batch:
+				# SpriteObject.draw culls by rect and blits get_blit()
+				if view.colliderect(obj.rect):
+					batch.append(obj.get_blit())
+				continue
+			if batch:
+				self._flush_blits(batch, dirty)
+				batch = []
+			drawn = obj.draw(surface)
+			if drawn is None:
+				reported = False
+			elif dirty is not None:
+				_add_dirty(dirty, drawn)
+		if batch:
+			self._flush_blits(batch, dirty)
+		return reported
+
+	def _flush_blits(self, batch, dirty):
+		drawn = self.surface.blits(batch, dirty is not None)
+		if dirty is not None:
+			dirty.extend(drawn)
 		
 	def handle_quit(self):
+		if not pygame.display.get_init():
+			# no video subsystem (headless without a video device): no events
+			return
+		# GameEnvironment only lets QUIT, KEYDOWN and expose events into the queue
 		for event in pygame.event.get():
 			if event.type == pygame.QUIT:
 				self.running = False
-			elif event.type == pygame.KEYDOWN:
-				if event.key == pygame.K_ESCAPE:
-					self.running = False
+			elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+				self.running = False
+			elif event.type in EXPOSE_EVENTS:
+				self.exposed = True
 
 	def update(self, dt):
 		# dt is seconds since last frame
-		# keys = pygame.key.get_pressed()
-		for obj in self.rootObject.children:
-			obj.update_all(dt)
+		# poll the keyboard once and hand the same snapshot to every object;
+		# without a video subsystem (e.g. after set_headless quit the display)
+		# there is no keyboard state, so report every key as released
+		if pygame.display.get_init():
+			keys = pygame.key.get_pressed()
+		else:
+			keys = NO_KEYS
+		self.keys = keys
+		# Walk the tree in pre-order as a flat loop, refreshing each object's
+		# absolute position from its parent; a disabled object skips straight
+		# past its subtree.
+		root = self.rootObject
+		order = self.get_order()
+		n = len(order)
+		i = 0
+		while i < n:
+			obj, end = order[i]
+			if not obj.enabled:
+				i = end
+				continue
+			parent = obj.parent_obj
+			pax = parent._abs_x
+			pay = parent._abs_y
+			obj._abs_x = pax + obj.x
+			obj._abs_y = pay + obj.y
+			obj.update(dt, keys)
+			# update() may have moved us, so children get our fresh position
+			obj._abs_x = pax + obj.x
+			obj._abs_y = pay + obj.y
+			i += 1
+			if root._dirty_tree:
+				# update() added/removed objects; resume after obj in the new
+				# order, or at obj's old slot if obj itself was removed
+				order = self.get_order()
+				n = len(order)
+				k = next((k for k, (o, _) in enumerate(order) if o is obj), None)
+				i = min(i - 1, n) if k is None else k + 1
 
 	def stop_game(self):
 		self.running = False
@@ -165,8 +421,22 @@ class GameEngine:
 
 class GameEnvironment:
 	def __init__(self, width=800, height=600, headless=False, fps=60):
-		# initialize pygame modules
-		pygame.init()
+		# initialize only the pygame modules we use. pygame.init() would also
+		# start audio and joystick support (probing devices even headless).
+		# display.init() opens no window by itself and gives headless runs the
+		# event queue and keyboard state when a video device exists; without
+		# one they still step (no events, every key reported released).
+		if headless:
+			try:
+				pygame.display.init()
+			except pygame.error:
+				pass
+		else:
+			pygame.display.init()
+		pygame.font.init()
+		clear_text_cache()
+		if pygame.display.get_init():
+			self._filter_events()
 		self.width = width
 		self.height = height
 		self.fps = fps
@@ -180,32 +450,66 @@ class GameEnvironment:
 			# do not call display.set_mode; create a plain Surface instead
 			self.screen = pygame.Surface((self.width, self.height))
 		else:
-			pygame.display.init()
 			pygame.display.set_caption("Pygame Boilerplate")
 			self.screen = pygame.display.set_mode((self.width, self.height))
 
 		self.bg_color = pygame.Color("#111111")
-		# font works without a display surface as long as pygame.font is initialized
-		self.font = pygame.font.Font(None, 24)
+		# rects drawn during the previous frame; they are erased and presented
+		# next frame so only changed areas are filled and pushed to the display
+		self._dirty_rects: list[pygame.Rect] = []
+		self._full_redraw = True
+		# once the dirty rects add up to more than this fraction of the screen,
+		# a single full fill/flip is cheaper than many overlapping small ones
+		self.dirty_area_limit = 0.5
 
 		# Game engine
 		self.game_engine = GameEngine(self.screen)
 		
 
 	def draw_fps(self):
-		fps_text = f"FPS: {int(self.clock.get_fps())}"
-		surf = self.font.render(fps_text, True, pygame.Color("white"))
-		self.screen.blit(surf, (8, 8))
+		# round to the nearest 5 so the text cache only holds a few entries
+		fps_text = f"FPS: {5 * round(self.clock.get_fps() / 5)}"
+		surf = render_text(fps_text, pygame.Color("white"))
+		return self.screen.blit(surf, (8, 8))
+
+	def request_full_redraw(self):
+		"""Fill and present the whole screen on the next draw, e.g. after
+		the screen Surface was recreated or the window was exposed.
+		"""
+		self._full_redraw = True
 
 	def draw(self):
-		self.screen.fill(self.bg_color)
-		self.draw_fps()
-		self.game_engine.draw()
+		# Erase only what was drawn last frame; everything else is still
+		# background. A full fill is needed on the first frame, after
+		# request_full_redraw(), and when the old rects cover too much.
+		if self.game_engine.exposed:
+			# parts of the window were lost, dirty rects alone won't restore them
+			self.game_engine.exposed = False
+			self._full_redraw = True
+		prev = self._dirty_rects
+		area_limit = self.dirty_area_limit * self.width * self.height
+		prev_area = rects_area(prev)
+		full = self._full_redraw or prev_area > area_limit
+		if full:
+			self.screen.fill(self.bg_color)
+		else:
+			for r in prev:
+				self.screen.fill(self.bg_color, r)
+		dirty = [self.draw_fps()]
+		# an object that does not report its rects could have drawn anywhere
+		reported = self.game_engine.draw(dirty)
 		# Only flip/update the display when not headless. In headless mode
 		# we keep rendering into the off-screen Surface so callers can still
 		# inspect it if needed (for screenshots/tests) without creating a window.
 		if not self.headless:
-			pygame.display.flip()
+			if full or not reported or prev_area + rects_area(dirty) > area_limit:
+				pygame.display.flip()
+			else:
+				# old rects clear moved/removed objects, new ones show them
+				pygame.display.update(prev + dirty)
+		self._dirty_rects = dirty
+		# unreported drawing can only be erased by a full fill next frame
+		self._full_redraw = not reported
 
 	def set_headless(self, headless):
 		# Allow switching between headless and windowed at runtime. This
@@ -224,10 +528,19 @@ class GameEnvironment:
 		else:
 			# re-init display and create a visible window
 			pygame.display.init()
+			self._filter_events()
 			pygame.display.set_caption("Pygame Boilerplate")
 			self.screen = pygame.display.set_mode((self.width, self.height))
 		# update GameEngine surface reference
 		self.game_engine.surface = self.screen
+		self.request_full_redraw()
+
+	def _filter_events(self):
+		# handle_quit only reacts to QUIT, KEYDOWN and window exposes; keep
+		# every other event type (mouse motion, ...) out of the queue entirely.
+		# Keyboard state for key.get_pressed() is tracked regardless.
+		pygame.event.set_blocked(None)
+		pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, *EXPOSE_EVENTS])
 
 	def step(self, dt):
 		self.game_engine.update(dt)
@@ -239,6 +552,7 @@ class GameEnvironment:
 			self.game_engine.handle_quit()
 			dt = self.clock.tick(self.fps) / 1000.0  # seconds
 			self.step(dt)
+		clear_text_cache()
 		pygame.quit()
 
 